@@ -12,19 +12,23 @@ Single-file Streamlit app providing:
 
 from __future__ import annotations
 
+import html
 import json
 import os
 import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import streamlit as st
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
 from models import AnalysisResult, BankScenario, PopulatedField
+from result_cache import RESULT_TTL_S, SemanticResultCache
 from retrieval import SimpleRetriever
 from engine import COREPAssistant
 from validation import validate
-from excel_export import generate_excel
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -69,6 +73,149 @@ def get_engine():
     return COREPAssistant(api_key=api_key)
 
 
+@st.cache_resource
+def get_result_cache():
+    return SemanticResultCache()
+
+
+class _UncachedResult(Exception):
+    """Carries an empty analysis out of the cached call so it is not stored."""
+
+    def __init__(self, result: AnalysisResult):
+        super().__init__("analysis returned no fields")
+        self.result = result
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=256)
+def _cached_analyze(
+    query: str,
+    scenario_key: str,
+    chunk_ids: tuple[str, ...],
+    engine_key: str,
+    ttl_bucket: int,
+    _scenario: BankScenario,
+    _retrieved_docs: list[dict],
+) -> AnalysisResult:
+    """Memoised engine.analyze(), keyed on query, scenario, retrieved chunk IDs
+    and the engine fingerprint.
+
+    Streamlit ignores ``ttl`` for disk-persisted caches, so *ttl_bucket* (the
+    current RESULT_TTL_S-long time window) is part of the key instead: entries
+    stop matching once the window rolls over. Underscore-prefixed arguments
+    are excluded from Streamlit's cache key; they are fully determined by the
+    hashed ones.
+    """
+    # Created inside the cached function so Streamlit can replay it on cache hits
+    progress = st.empty()
+    result = get_engine().analyze(
+        query,
+        _scenario,
+        _retrieved_docs,
+        on_progress=lambda n: progress.caption(f"Populating field {n}…"),
+    )
+    progress.empty()
+    if not result.fields:
+        # Exceptions are never cached, so a failed run is retried next time
+        raise _UncachedResult(result)
+    return result
+
+
+def run_analysis(
+    query: str,
+    scenario: BankScenario,
+    retrieved_docs: list[dict],
+    retrieval_method: str = "auto",
+) -> AnalysisResult:
+    """
+    Run the Gemini analysis, returning a cached result for identical inputs,
+    or for the same scenario and passages with a near-identical (paraphrased)
+    query.
+    """
+    engine_key = get_engine().fingerprint
+    scenario_key = json.dumps(scenario.model_dump(), sort_keys=True)
+    chunk_ids = tuple(sorted(doc["chunk_id"] for doc in retrieved_docs))
+
+    query_vec = None
+    if retrieval_method != "keyword":
+        # Semantic lookup; the query embedding is already cached by retrieval.
+        # Keyword-only runs skip it rather than pay for an embedding call.
+        try:
+            query_vec = get_retriever().embed_query(query)
+        except Exception:
+            # No Gemini client or embedding call failed – skip the semantic cache
+            pass
+    if query_vec is not None:
+        hit = get_result_cache().lookup(engine_key, scenario_key, chunk_ids, query_vec)
+        if hit is not None:
+            return hit
+
+    try:
+        result = _cached_analyze(
+            query,
+            scenario_key,
+            chunk_ids,
+            engine_key,
+            int(time.time() // RESULT_TTL_S),
+            scenario,
+            retrieved_docs,
+        )
+    except _UncachedResult as exc:
+        return exc.result
+
+    if query_vec is not None:
+        get_result_cache().store(engine_key, scenario_key, chunk_ids, query_vec, result)
+    return result
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Shared pool for background work (held across reruns like the engine)."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def _excel_bytes(fields: list[PopulatedField], val_results, session_id: str) -> bytes:
+    # openpyxl is only needed once there is something to export
+    from excel_export import generate_excel
+
+    return generate_excel(fields, val_results, session_id).getvalue()
+
+
+def parse_scenario(scenario_json: str) -> BankScenario:
+    """Parse the scenario text area, reusing the last result while the text is unchanged.
+
+    Every widget interaction reruns the script, so this skips json.loads and
+    Pydantic validation on reruns that did not touch the scenario.
+    """
+    if st.session_state.get("_scenario_text") != scenario_json:
+        st.session_state["_scenario_parsed"] = BankScenario.model_validate(json.loads(scenario_json))
+        st.session_state["_scenario_text"] = scenario_json
+    return st.session_state["_scenario_parsed"]
+
+
+_CONFIDENCE_COLORS = {"high": "#c6efce", "medium": "#ffeb9c", "low": "#ffc7ce"}
+
+
+def _fields_table_html(fields: list[PopulatedField]) -> str:
+    """Render the populated fields as a plain HTML table with colour-coded confidence."""
+    rows = []
+    for f in fields:
+        conf = getattr(f.confidence, "value", f.confidence)
+        rows.append(
+            "<tr>"
+            f"<td>{html.escape(f.field_id)}</td>"
+            f"<td>{html.escape(f.field_name)}</td>"
+            f"<td style='text-align:right'>{f.value:,.0f}</td>"
+            f"<td style='background-color:{_CONFIDENCE_COLORS.get(conf, '')}'>{html.escape(conf)}</td>"
+            "</tr>"
+        )
+    return (
+        "<table style='width:100%'>"
+        "<tr><th>Field ID</th><th>Field Name</th><th>Value (£000s)</th><th>Confidence</th></tr>"
+        + "".join(rows)
+        + "</table>"
+    )
+
+
 def load_test_scenarios() -> list[dict]:
     with open(SCENARIOS_PATH, encoding="utf-8") as f:
         return json.load(f)
@@ -174,10 +321,13 @@ def render_main(default_query: str, default_scenario: dict, retrieval_method: st
 
     # Validate JSON
     try:
-        scenario_dict = json.loads(scenario_json)
+        scenario = parse_scenario(scenario_json)
     except json.JSONDecodeError:
         st.error("Invalid JSON in scenario field. Please fix and try again.")
         return
+    except ValidationError as exc:
+        st.error(f"Invalid scenario data: {exc}")
+        return
 
     # ── Run button ─────────────────────────────────────────────────────
     run_pressed = st.button(
@@ -197,13 +347,12 @@ def render_main(default_query: str, default_scenario: dict, retrieval_method: st
             return
 
         retriever = get_retriever()
-        scenario = BankScenario(**scenario_dict)
 
         with st.spinner("Retrieving regulatory passages..."):
             retrieved_docs = retriever.retrieve(query, top_k=6, method=retrieval_method)
 
         with st.spinner("Running Gemini analysis (10-20s)..."):
-            result = engine.analyze(query, scenario, retrieved_docs)
+            result = run_analysis(query, scenario, retrieved_docs, retrieval_method)
 
         with st.spinner("Running validation checks..."):
             val_results = validate(result.fields)
@@ -213,6 +362,10 @@ def render_main(default_query: str, default_scenario: dict, retrieval_method: st
         st.session_state["retrieved_docs"] = retrieved_docs
         st.session_state["val_results"] = val_results
         st.session_state["session_id"] = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Build the workbook while the user reads the results
+        st.session_state["excel_future"] = get_executor().submit(
+            _excel_bytes, result.fields, val_results, st.session_state["session_id"]
+        )
 
     # ── Display results ────────────────────────────────────────────────
     result: AnalysisResult = st.session_state["result"]
@@ -236,26 +389,7 @@ def render_main(default_query: str, default_scenario: dict, retrieval_method: st
     st.subheader("3. Populated Template — C 01.00 (Own Funds)")
 
     if result.fields:
-        # Build display table
-        rows = []
-        for f in result.fields:
-            rows.append({
-                "Field ID": f.field_id,
-                "Field Name": f.field_name,
-                "Value (£000s)": f"{f.value:,.0f}",
-                "Confidence": f.confidence,
-            })
-
-        import pandas as pd
-        df = pd.DataFrame(rows)
-
-        # Color-code confidence
-        def _color_confidence(val):
-            colors = {"high": "#c6efce", "medium": "#ffeb9c", "low": "#ffc7ce"}
-            return f"background-color: {colors.get(val, '')}"
-
-        styled = df.style.applymap(_color_confidence, subset=["Confidence"])
-        st.dataframe(styled, use_container_width=True, hide_index=True)
+        st.markdown(_fields_table_html(result.fields), unsafe_allow_html=True)
     else:
         st.warning("No fields were populated. Check the LLM response.")
 
@@ -292,15 +426,12 @@ def render_main(default_query: str, default_scenario: dict, retrieval_method: st
     st.markdown("---")
     st.subheader("6. Export")
 
-    excel_buf = generate_excel(
-        result.fields,
-        val_results,
-        st.session_state.get("session_id", "export"),
-    )
+    # Normally finished in the background long before this point
+    excel_bytes = st.session_state["excel_future"].result()
 
     st.download_button(
         label="📥 Download Excel Report (C 01.00)",
-        data=excel_buf,
+        data=excel_bytes,
         file_name=f"COREP_C0100_{st.session_state.get('session_id', 'export')}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
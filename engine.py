@@ -7,12 +7,10 @@ valid JSON responses mapped directly to Pydantic models.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import pathlib
-from typing import Optional
-
-from google import genai
-from google.genai import types
+from typing import Callable, Optional
 
 from models import AnalysisResult, BankScenario, PopulatedField, TemplateSchema
 
@@ -62,39 +60,76 @@ class COREPAssistant:
         api_key: Optional[str] = None,
         template_path: str | pathlib.Path = _TEMPLATE_PATH,
     ):
-        self.client = genai.Client(api_key=api_key) if api_key else genai.Client()
-        self.template = self._load_template(template_path)
+        # google.genai is heavy to import; it is only needed once an engine exists
+        from google import genai
 
-    @staticmethod
-    def _load_template(path: str | pathlib.Path) -> TemplateSchema:
+        self.client = genai.Client(api_key=api_key) if api_key else genai.Client()
+        # The template is immutable for the engine's lifetime, so the prompt
+        # prefix is rendered once here
+        self.template, self._static_prompt = self._load_template(template_path)
+        # Identifies everything that shapes an analysis besides its inputs
+        # (model, instructions, template, and this module's prompt code), so
+        # callers can key stored results on it
+        self.fingerprint = hashlib.sha256(
+            (GEMINI_MODEL + SYSTEM_INSTRUCTION + self._static_prompt).encode("utf-8")
+            + pathlib.Path(__file__).read_bytes()
+        ).hexdigest()[:16]
+
+    @classmethod
+    def _load_template(cls, path: str | pathlib.Path) -> tuple[TemplateSchema, str]:
+        """Load and validate the template; return it with its rendered static prompt."""
         with open(path, encoding="utf-8") as f:
             raw = json.load(f)
-        return TemplateSchema(**raw)
+        template = TemplateSchema(**raw)
+        return template, cls._build_static_prompt(template)
 
     # ------------------------------------------------------------------
-    # Build the user prompt
+    # Build the prompt
     # ------------------------------------------------------------------
 
+    @staticmethod
+    def _build_static_prompt(template: TemplateSchema) -> str:
+        """Template definitions and instructions – identical for every request.
+
+        Rendered once per engine and sent ahead of the per-request prompt.
+        """
+        # Template field definitions
+        field_defs = "\n".join(
+            f"  {f.field_id}: {f.name}"
+            + (f" (formula: {f.formula})" if f.formula else "")
+            + f" [{f.crr_reference}]"
+            for f in template.fields
+        )
+
+        return f"""\
+TEMPLATE FIELDS TO POPULATE ({template.template_id} — {template.template_name}):
+{field_defs}
+
+VALIDATION RULES THAT MUST HOLD:
+{chr(10).join(f"  {r.rule_id}: {r.expression} — {r.description}" for r in template.validation_rules)}
+
+INSTRUCTIONS:
+- Populate ALL template fields listed above
+- For each field, provide the value, step-by-step reasoning, and regulatory citations
+- Deduction fields (goodwill, intangibles, DTA) should be reported as POSITIVE numbers
+- Ensure all validation rules hold in your output
+- Set confidence to "high" when the mapping is direct, "medium" when judgment is needed, "low" when data is missing
+- If a field has no applicable data, set value to 0 and explain why
+"""
+
     def _build_prompt(
         self,
         query: str,
         scenario: BankScenario,
         retrieved_docs: list[dict],
     ) -> str:
+        """Per-request part of the prompt: query, scenario and retrieved passages."""
         # Regulatory context
         reg_context = "\n\n".join(
             f"[{doc['source']} — {doc['section_ref']}]\n{doc['text']}"
             for doc in retrieved_docs
         )
 
-        # Template field definitions
-        field_defs = "\n".join(
-            f"  {f.field_id}: {f.name}"
-            + (f" (formula: {f.formula})" if f.formula else "")
-            + f" [{f.crr_reference}]"
-            for f in self.template.fields
-        )
-
         # Scenario data
         scenario_json = json.dumps(scenario.model_dump(), indent=2)
 
@@ -107,21 +142,48 @@ BANK SCENARIO DATA (all values in thousands GBP):
 
 RELEVANT REGULATORY TEXT:
 {reg_context}
+"""
 
-TEMPLATE FIELDS TO POPULATE ({self.template.template_id} — {self.template.template_name}):
-{field_defs}
+    # ------------------------------------------------------------------
+    # Call Gemini
+    # ------------------------------------------------------------------
 
-VALIDATION RULES THAT MUST HOLD:
-{chr(10).join(f"  {r.rule_id}: {r.expression} — {r.description}" for r in self.template.validation_rules)}
+    def _stream_text(self, contents, config, on_progress) -> str:
+        """Stream a response, reporting the number of fields emitted so far."""
+        parts: list[str] = []
+        fields_seen = 0
+        for chunk in self.client.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=contents,
+            config=config,
+        ):
+            if not chunk.text:
+                continue
+            parts.append(chunk.text)
+            if on_progress is not None:
+                n = "".join(parts).count('"field_id"')
+                if n != fields_seen:
+                    fields_seen = n
+                    on_progress(n)
+        return "".join(parts)
+
+    def _generate(
+        self,
+        prompt: str,
+        max_output_tokens: int,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> str:
+        """Stream a Gemini response for *prompt*, preceded by the static prefix."""
+        from google.genai import types
 
-INSTRUCTIONS:
-- Populate ALL template fields listed above
-- For each field, provide the value, step-by-step reasoning, and regulatory citations
-- Deduction fields (goodwill, intangibles, DTA) should be reported as POSITIVE numbers
-- Ensure all validation rules hold in your output
-- Set confidence to "high" when the mapping is direct, "medium" when judgment is needed, "low" when data is missing
-- If a field has no applicable data, set value to 0 and explain why
-"""
+        config = types.GenerateContentConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            response_mime_type="application/json",
+            response_schema=AnalysisResult,
+            temperature=0.2,
+            max_output_tokens=max_output_tokens,
+        )
+        return self._stream_text([self._static_prompt, prompt], config, on_progress)
 
     # ------------------------------------------------------------------
     # Run analysis
@@ -132,57 +194,33 @@ INSTRUCTIONS:
         query: str,
         scenario: BankScenario,
         retrieved_docs: list[dict],
+        on_progress: Optional[Callable[[int], None]] = None,
     ) -> AnalysisResult:
         """
         Run Gemini analysis and return structured AnalysisResult.
 
         Uses Gemini's native JSON schema enforcement to guarantee valid output.
+        The response is streamed; *on_progress*, if given, is called with the
+        number of fields received so far whenever it changes.
         """
         prompt = self._build_prompt(query, scenario, retrieved_docs)
-
-        config = types.GenerateContentConfig(
-            system_instruction=SYSTEM_INSTRUCTION,
-            response_mime_type="application/json",
-            response_schema=AnalysisResult,
-            temperature=0.2,
-            max_output_tokens=16384,
-        )
+        # Enough for all template fields; the retry raises it if truncated
+        max_output_tokens = 8192
 
         # Try up to 2 times — first attempt may truncate on very large outputs
         last_error = None
         for attempt in range(2):
-            response = self.client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt,
-                config=config,
-            )
-
-            # Check for truncation via finish_reason
-            finish_reason = None
-            if response.candidates and response.candidates[0].finish_reason:
-                finish_reason = response.candidates[0].finish_reason
-
-            # response.parsed is already an AnalysisResult instance
-            if response.parsed is not None:
-                return response.parsed
-
-            # Fallback: parse from text if .parsed is None
-            text = response.text or ""
-            if text.strip().startswith("{"):
-                try:
-                    return AnalysisResult.model_validate_json(text)
-                except Exception as e:
-                    last_error = e
-                    # If truncated, retry with even higher token limit
-                    if attempt == 0:
-                        config = types.GenerateContentConfig(
-                            system_instruction=SYSTEM_INSTRUCTION,
-                            response_mime_type="application/json",
-                            response_schema=AnalysisResult,
-                            temperature=0.2,
-                            max_output_tokens=32768,
-                        )
-                        continue
+            text = self._generate(prompt, max_output_tokens, on_progress)
+
+            try:
+                return AnalysisResult.model_validate_json(text)
+            except Exception as e:
+                last_error = e
+                # Likely truncated – retry with a higher token limit
+                if attempt == 0:
+                    max_output_tokens = 32768
+                    continue
+                if text.strip().startswith("{"):
                     raise
 
         # Last resort: return empty result with warning
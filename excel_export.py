@@ -13,6 +13,7 @@ import io
 from typing import Optional
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.comments import Comment
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 
@@ -43,53 +44,72 @@ _PASS_FILL = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="so
 _FAIL_FILL = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
 
 
-def _style_header_row(ws, row: int, cols: int):
-    for col in range(1, cols + 1):
-        cell = ws.cell(row=row, column=col)
-        cell.fill = _HEADER_FILL
-        cell.font = _HEADER_FONT
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        cell.border = _THIN_BORDER
+def _cell(ws, value, *, font=None, fill=None, border=None, alignment=None, number_format=None):
+    """Build a styled write-only cell (write-only sheets have no random cell access)."""
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if border is not None:
+        cell.border = border
+    if alignment is not None:
+        cell.alignment = alignment
+    if number_format is not None:
+        cell.number_format = number_format
+    return cell
+
+
+def _header_row(ws, headers: list[str]) -> list:
+    return [
+        _cell(
+            ws, h,
+            font=_HEADER_FONT,
+            fill=_HEADER_FILL,
+            border=_THIN_BORDER,
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        )
+        for h in headers
+    ]
+
+
+def _set_widths(ws, widths: dict[str, float]):
+    # Must run before the first append: column widths are written with the sheet header
+    for col, width in widths.items():
+        ws.column_dimensions[col].width = width
 
 
 # ---------------------------------------------------------------------------
 # Sheet builders
+#
+# Sheets are streamed row by row (write-only mode), so rows must be appended
+# in order and all styling is applied per cell as it is written.
 # ---------------------------------------------------------------------------
 
 def _build_template_sheet(wb: Workbook, fields: list[PopulatedField]):
-    ws = wb.active
-    ws.title = "C 01.00 Own Funds"
+    ws = wb.create_sheet("C 01.00 Own Funds")
+
+    _set_widths(ws, {"A": 16, "B": 55, "C": 18, "D": 14})
 
     # Title
-    ws.merge_cells("A1:D1")
-    ws["A1"] = "COREP Template C 01.00 — Own Funds"
-    ws["A1"].font = _TITLE_FONT
+    ws.merged_cells.add("A1:D1")
+    ws.append([_cell(ws, "COREP Template C 01.00 — Own Funds", font=_TITLE_FONT)])
 
-    ws.merge_cells("A2:D2")
-    ws["A2"] = "Values in thousands GBP | Generated by COREP Assistant"
-    ws["A2"].font = _SUBTITLE_FONT
+    ws.merged_cells.add("A2:D2")
+    ws.append([_cell(ws, "Values in thousands GBP | Generated by COREP Assistant", font=_SUBTITLE_FONT)])
+    ws.append([])
 
     # Headers
-    headers = ["Field ID", "Field Name", "Value (£000s)", "Confidence"]
-    for col, h in enumerate(headers, 1):
-        ws.cell(row=4, column=col, value=h)
-    _style_header_row(ws, 4, len(headers))
+    ws.append(_header_row(ws, ["Field ID", "Field Name", "Value (£000s)", "Confidence"]))
 
     # Data rows
-    for i, field in enumerate(fields, 5):
-        ws.cell(row=i, column=1, value=field.field_id).border = _THIN_BORDER
-        ws.cell(row=i, column=2, value=field.field_name).border = _THIN_BORDER
-
-        val_cell = ws.cell(row=i, column=3, value=field.value)
-        val_cell.number_format = "#,##0"
-        val_cell.border = _THIN_BORDER
-        val_cell.alignment = Alignment(horizontal="right")
-
-        conf_cell = ws.cell(row=i, column=4, value=field.confidence)
-        conf_cell.fill = _CONFIDENCE_FILLS.get(field.confidence, PatternFill())
-        conf_cell.border = _THIN_BORDER
-        conf_cell.alignment = Alignment(horizontal="center")
-
+    for field in fields:
+        val_cell = _cell(
+            ws, field.value,
+            border=_THIN_BORDER,
+            alignment=Alignment(horizontal="right"),
+            number_format="#,##0",
+        )
         # Add reasoning as a comment on the value cell
         comment_text = (
             f"Reasoning: {field.reasoning}\n\n"
@@ -97,83 +117,74 @@ def _build_template_sheet(wb: Workbook, fields: list[PopulatedField]):
         )
         val_cell.comment = Comment(comment_text, "COREP Assistant")
 
-    # Column widths
-    ws.column_dimensions["A"].width = 16
-    ws.column_dimensions["B"].width = 55
-    ws.column_dimensions["C"].width = 18
-    ws.column_dimensions["D"].width = 14
+        ws.append([
+            _cell(ws, field.field_id, border=_THIN_BORDER),
+            _cell(ws, field.field_name, border=_THIN_BORDER),
+            val_cell,
+            _cell(
+                ws, field.confidence,
+                fill=_CONFIDENCE_FILLS.get(field.confidence, PatternFill()),
+                border=_THIN_BORDER,
+                alignment=Alignment(horizontal="center"),
+            ),
+        ])
 
 
 def _build_audit_sheet(wb: Workbook, fields: list[PopulatedField]):
     ws = wb.create_sheet("Audit Trail")
 
-    ws.merge_cells("A1:E1")
-    ws["A1"] = "Audit Trail — Field-by-Field Reasoning"
-    ws["A1"].font = _TITLE_FONT
-
-    headers = ["Field ID", "Field Name", "Value (£000s)", "Reasoning", "Citations"]
-    for col, h in enumerate(headers, 1):
-        ws.cell(row=3, column=col, value=h)
-    _style_header_row(ws, 3, len(headers))
+    _set_widths(ws, {"A": 16, "B": 45, "C": 16, "D": 60, "E": 35})
 
-    for i, field in enumerate(fields, 4):
-        ws.cell(row=i, column=1, value=field.field_id).border = _THIN_BORDER
-        ws.cell(row=i, column=2, value=field.field_name).border = _THIN_BORDER
+    ws.merged_cells.add("A1:E1")
+    ws.append([_cell(ws, "Audit Trail — Field-by-Field Reasoning", font=_TITLE_FONT)])
+    ws.append([])
 
-        val_cell = ws.cell(row=i, column=3, value=field.value)
-        val_cell.number_format = "#,##0"
-        val_cell.border = _THIN_BORDER
+    ws.append(_header_row(ws, ["Field ID", "Field Name", "Value (£000s)", "Reasoning", "Citations"]))
 
-        reason_cell = ws.cell(row=i, column=4, value=field.reasoning)
-        reason_cell.alignment = Alignment(wrap_text=True, vertical="top")
-        reason_cell.border = _THIN_BORDER
-
-        cite_cell = ws.cell(row=i, column=5, value=", ".join(field.citations))
-        cite_cell.alignment = Alignment(wrap_text=True, vertical="top")
-        cite_cell.border = _THIN_BORDER
-
-    ws.column_dimensions["A"].width = 16
-    ws.column_dimensions["B"].width = 45
-    ws.column_dimensions["C"].width = 16
-    ws.column_dimensions["D"].width = 60
-    ws.column_dimensions["E"].width = 35
+    wrap_top = Alignment(wrap_text=True, vertical="top")
+    for field in fields:
+        ws.append([
+            _cell(ws, field.field_id, border=_THIN_BORDER),
+            _cell(ws, field.field_name, border=_THIN_BORDER),
+            _cell(ws, field.value, border=_THIN_BORDER, number_format="#,##0"),
+            _cell(ws, field.reasoning, border=_THIN_BORDER, alignment=wrap_top),
+            _cell(ws, ", ".join(field.citations), border=_THIN_BORDER, alignment=wrap_top),
+        ])
 
 
 def _build_validation_sheet(wb: Workbook, results: list[ValidationResult]):
     ws = wb.create_sheet("Validation Results")
 
-    ws.merge_cells("A1:E1")
-    ws["A1"] = "Validation Results — Intra-Template Checks"
-    ws["A1"].font = _TITLE_FONT
-
-    headers = ["Rule ID", "Description", "Status", "Expected", "Actual"]
-    for col, h in enumerate(headers, 1):
-        ws.cell(row=3, column=col, value=h)
-    _style_header_row(ws, 3, len(headers))
-
-    for i, r in enumerate(results, 4):
-        ws.cell(row=i, column=1, value=r.rule_id).border = _THIN_BORDER
-        ws.cell(row=i, column=2, value=r.description).border = _THIN_BORDER
-
-        status_cell = ws.cell(row=i, column=3, value="PASS" if r.passed else "FAIL")
-        status_cell.fill = _PASS_FILL if r.passed else _FAIL_FILL
-        status_cell.font = Font(bold=True)
-        status_cell.alignment = Alignment(horizontal="center")
-        status_cell.border = _THIN_BORDER
-
-        exp_cell = ws.cell(row=i, column=4, value=r.expected if r.expected is not None else "")
-        exp_cell.number_format = "#,##0"
-        exp_cell.border = _THIN_BORDER
-
-        act_cell = ws.cell(row=i, column=5, value=r.actual if r.actual is not None else "")
-        act_cell.number_format = "#,##0"
-        act_cell.border = _THIN_BORDER
-
-    ws.column_dimensions["A"].width = 12
-    ws.column_dimensions["B"].width = 55
-    ws.column_dimensions["C"].width = 12
-    ws.column_dimensions["D"].width = 16
-    ws.column_dimensions["E"].width = 16
+    _set_widths(ws, {"A": 12, "B": 55, "C": 12, "D": 16, "E": 16})
+
+    ws.merged_cells.add("A1:E1")
+    ws.append([_cell(ws, "Validation Results — Intra-Template Checks", font=_TITLE_FONT)])
+    ws.append([])
+
+    ws.append(_header_row(ws, ["Rule ID", "Description", "Status", "Expected", "Actual"]))
+
+    for r in results:
+        ws.append([
+            _cell(ws, r.rule_id, border=_THIN_BORDER),
+            _cell(ws, r.description, border=_THIN_BORDER),
+            _cell(
+                ws, "PASS" if r.passed else "FAIL",
+                font=Font(bold=True),
+                fill=_PASS_FILL if r.passed else _FAIL_FILL,
+                border=_THIN_BORDER,
+                alignment=Alignment(horizontal="center"),
+            ),
+            _cell(
+                ws, r.expected if r.expected is not None else "",
+                border=_THIN_BORDER,
+                number_format="#,##0",
+            ),
+            _cell(
+                ws, r.actual if r.actual is not None else "",
+                border=_THIN_BORDER,
+                number_format="#,##0",
+            ),
+        ])
 
 
 # ---------------------------------------------------------------------------
@@ -190,7 +201,9 @@ def generate_excel(
 
     Returns a BytesIO buffer ready for Streamlit's download_button.
     """
-    wb = Workbook()
+    # write_only streams each sheet's rows to a temp file instead of holding
+    # the full cell tree in memory
+    wb = Workbook(write_only=True)
 
     _build_template_sheet(wb, fields)
     _build_audit_sheet(wb, fields)
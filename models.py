@@ -1,13 +1,19 @@
 """
 Pydantic models for the COREP Assistant.
 These serve triple duty: data validation, Gemini structured output schema, and documentation.
+
+ValidationResult and PopulatedFieldBatch are the exceptions: they are produced
+internally by the validation engine in bulk, so they are lightweight slotted
+dataclasses instead.
 """
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
+import numpy as np
 from pydantic import BaseModel, Field
 
 
@@ -122,14 +128,63 @@ class AnalysisResult(BaseModel):
     )
 
 
+@dataclass(slots=True, frozen=True, eq=False)
+class PopulatedFieldBatch:
+    """Columnar field values for one report, keyed by integer row codes.
+
+    codes[i] is the position of a row in validation.ROW_IDS and values[i] its
+    value; codes are unique. Built with validation.fields_to_batch().
+    Compared and hashed by identity: element-wise ndarray equality has no
+    single truth value.
+    """
+    codes: np.ndarray   # intp
+    values: np.ndarray  # float64
+
+
 # ---------------------------------------------------------------------------
 # Validation result
 # ---------------------------------------------------------------------------
 
-class ValidationResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class ValidationResult:
     rule_id: str
     description: str
     passed: bool
     expected: Optional[float] = None
     actual: Optional[float] = None
-    message: str = ""
+    # Failure message template and the row values it refers to; the message
+    # is only formatted when read. Internal to the validation engine – use
+    # with_message() to build a result with a ready-made message.
+    _message_format: str = field(default="", repr=False, compare=False, kw_only=True)
+    _row_values: Optional[dict[str, float]] = field(
+        default=None, repr=False, compare=False, kw_only=True
+    )
+
+    @classmethod
+    def with_message(
+        cls,
+        rule_id: str,
+        description: str,
+        passed: bool,
+        message: str = "",
+        expected: Optional[float] = None,
+        actual: Optional[float] = None,
+    ) -> ValidationResult:
+        """Build a result with an explicit, already formatted *message*."""
+        return cls(
+            rule_id=rule_id,
+            description=description,
+            passed=passed,
+            expected=expected,
+            actual=actual,
+            _message_format=message,
+        )
+
+    @property
+    def message(self) -> str:
+        """Explanation of the failure ("" when the rule passed)."""
+        if self._row_values is None:
+            return self._message_format
+        return self._message_format.format(
+            expected=self.expected, actual=self.actual, **self._row_values
+        )
@@ -0,0 +1,171 @@
+"""
+Semantic cache for whole analysis runs.
+
+Stores each AnalysisResult alongside the normalised embedding of the query
+that produced it, in a small SQLite database. A later run with the *same*
+scenario data and retrieved passages, and a query whose embedding has cosine
+similarity above the threshold (e.g. a paraphrase), reuses the stored result
+instead of calling Gemini again.
+
+The scenario must match exactly: scenarios that differ only in their figures
+embed almost identically, and reusing their results would report wrong
+numbers. The retrieved chunk IDs must match too, so the reasoning and
+citations shown always come from the passages displayed alongside them, and
+so must the engine fingerprint, so edits to the model, prompt or template
+never serve results produced by the old ones. Entries expire after a TTL.
+"""
+
+from __future__ import annotations
+
+import pathlib
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+from models import AnalysisResult
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+_DB_PATH = pathlib.Path(__file__).parent / "data" / "result_cache.sqlite3"
+SIMILARITY_THRESHOLD = 0.97
+RESULT_TTL_S = 7 * 24 * 3600
+_SCHEMA_VERSION = 3  # bump when the table layout changes; old rows are dropped
+
+
+# ---------------------------------------------------------------------------
+# Helper: chunk ID key
+# ---------------------------------------------------------------------------
+
+def _join_ids(chunk_ids: tuple[str, ...]) -> str:
+    # NUL never appears in chunk IDs, so the joined key is unambiguous
+    return "\0".join(chunk_ids)
+
+
+# ---------------------------------------------------------------------------
+# Cache class
+# ---------------------------------------------------------------------------
+
+class SemanticResultCache:
+    """SQLite-backed store of (engine, scenario, chunk IDs, query embedding) -> AnalysisResult."""
+
+    def __init__(
+        self,
+        db_path: str | pathlib.Path = _DB_PATH,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_s: float = RESULT_TTL_S,
+    ):
+        self.db_path = pathlib.Path(db_path)
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self._disabled = False
+        try:
+            self._init_db()
+        except sqlite3.Error as exc:
+            # The cache is optional – a read-only or corrupt database just
+            # means every run goes to Gemini
+            print(f"[result_cache] Result cache unavailable: {exc}")
+            self._disabled = True
+
+    def _init_db(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                # Only a cache – discard entries written with an older layout
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " engine_key TEXT NOT NULL,"
+                " scenario_key TEXT NOT NULL,"
+                " chunk_ids TEXT NOT NULL,"
+                " embedding BLOB NOT NULL,"
+                " result_json TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_key"
+                " ON results (engine_key, scenario_key, chunk_ids)"
+            )
+            # Expired rows are never returned; clear them out on startup
+            conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_s,))
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: the cache is shared across
+        # Streamlit session threads and sqlite3 connections are not
+        return sqlite3.connect(self.db_path)
+
+    def lookup(
+        self,
+        engine_key: str,
+        scenario_key: str,
+        chunk_ids: tuple[str, ...],
+        query_vec: np.ndarray,
+    ) -> AnalysisResult | None:
+        """
+        Return the unexpired result for *engine_key*, *scenario_key* and
+        *chunk_ids* whose query embedding is most similar to *query_vec*, if it
+        clears the threshold.
+
+        *query_vec* must be L2-normalised (as returned by SimpleRetriever.embed_query).
+        Database errors are reported as a miss.
+        """
+        if self._disabled:
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT embedding, result_json FROM results"
+                    " WHERE engine_key = ? AND scenario_key = ? AND chunk_ids = ?"
+                    " AND created_at >= ?",
+                    (engine_key, scenario_key, _join_ids(chunk_ids), time.time() - self.ttl_s),
+                ).fetchall()
+        except sqlite3.Error as exc:
+            print(f"[result_cache] Lookup failed, treating as a miss: {exc}")
+            return None
+
+        # Only embeddings of the query's size are comparable (rows written
+        # under a different embedding model are skipped)
+        nbytes = 4 * query_vec.shape[0]
+        rows = [row for row in rows if len(row[0]) == nbytes]
+        if not rows:
+            return None
+
+        embeddings = np.stack([np.frombuffer(emb, dtype=np.float32) for emb, _ in rows])
+        scores = embeddings @ query_vec.astype(np.float32, copy=False)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return AnalysisResult.model_validate_json(rows[best][1])
+
+    def store(
+        self,
+        engine_key: str,
+        scenario_key: str,
+        chunk_ids: tuple[str, ...],
+        query_vec: np.ndarray,
+        result: AnalysisResult,
+    ) -> None:
+        """Record *result* for later lookups. Database errors skip the store."""
+        if self._disabled:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT INTO results"
+                    " (engine_key, scenario_key, chunk_ids, embedding, result_json, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        engine_key,
+                        scenario_key,
+                        _join_ids(chunk_ids),
+                        query_vec.astype(np.float32).tobytes(),
+                        result.model_dump_json(),
+                        time.time(),
+                    ),
+                )
+        except sqlite3.Error as exc:
+            print(f"[result_cache] Could not store result: {exc}")
@@ -5,14 +5,21 @@ Two strategies:
   1. Gemini embeddings + cosine similarity  (primary)
   2. Keyword matching                       (fallback)
 
-Embeddings are cached to a local .npy file so they are only generated once.
+Embeddings are cached to a local .npy file (float16, memory-mapped on load)
+so they are only generated once.
 """
 
 from __future__ import annotations
 
+import bisect
+import hashlib
+import heapq
 import json
 import os
 import pathlib
+import pickle
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 import numpy as np
@@ -25,21 +32,41 @@ from models import RegulatoryChunk
 
 _CORPUS_PATH = pathlib.Path(__file__).parent / "data" / "regulatory_corpus.json"
 _CACHE_DIR = pathlib.Path(__file__).parent / "data"
-_EMBED_CACHE = _CACHE_DIR / "embeddings_cache.npy"
+_EMBED_CACHE = _CACHE_DIR / "embeddings_normed.npy"  # unit-length rows
 _IDS_CACHE = _CACHE_DIR / "embeddings_ids.json"
+_SNAPSHOT = _CACHE_DIR / "retriever_snapshot.pkl"  # parsed chunks + keyword index
+_SNAPSHOT_VERSION = 1  # bump when the snapshot layout changes
 
 EMBED_MODEL = "gemini-embedding-001"
+_EMBED_BATCH_SIZE = 100  # max contents per embed_content request
+_QUERY_CACHE_SIZE = 256   # query embeddings kept in memory (LRU)
+_SCORE_BLOCK_ROWS = 4096  # corpus rows upcast to float32 at a time when scoring
 
 
 # ---------------------------------------------------------------------------
-# Helper: cosine similarity
+# Helper: L2 normalisation
 # ---------------------------------------------------------------------------
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
-    """Cosine similarity between vector *a* and each row in matrix *b*."""
-    a_norm = a / (np.linalg.norm(a) + 1e-10)
-    b_norms = b / (np.linalg.norm(b, axis=1, keepdims=True) + 1e-10)
-    return b_norms @ a_norm
+def _l2_normalize(v: np.ndarray) -> np.ndarray:
+    """Scale *v* (a vector, or each row of a matrix) to unit length.
+
+    Corpus embeddings are normalised once at build time, so cosine
+    similarity against a normalised query is a single matrix-vector product.
+    """
+    if v.ndim == 1:
+        return v / (np.linalg.norm(v) + 1e-10)
+    return v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-10)
+
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the *top_k* highest scores, best first.
+
+    Partitions instead of fully sorting, so only the k winners are ordered.
+    """
+    if top_k >= len(scores):
+        return np.argsort(-scores)
+    idx = np.argpartition(-scores, top_k)[:top_k]
+    return idx[np.argsort(-scores[idx])]
 
 
 # ---------------------------------------------------------------------------
@@ -55,10 +82,18 @@ class SimpleRetriever:
         gemini_client=None,
     ):
         self.corpus_path = pathlib.Path(corpus_path)
-        self.chunks: list[RegulatoryChunk] = self._load_corpus()
+        self.chunks: list[RegulatoryChunk] = []
+        if not self._load_snapshot():
+            self.chunks = self._load_corpus()
+            self._build_keyword_index()
+            self._save_snapshot()
         self._client = gemini_client  # google.genai.Client (optional)
-        self._embeddings: Optional[np.ndarray] = None
+        self._embeddings: Optional[np.ndarray] = None  # float16, possibly memory-mapped
         self._embed_ids: list[str] = []
+        # LRU of normalised query vectors; the retriever is shared across
+        # Streamlit sessions, so access is guarded by a lock
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Load corpus
@@ -69,6 +104,81 @@ class SimpleRetriever:
             raw = json.load(f)
         return [RegulatoryChunk(**item) for item in raw]
 
+    # ------------------------------------------------------------------
+    # Snapshot of the parsed corpus (skips JSON + Pydantic on cold start)
+    # ------------------------------------------------------------------
+
+    def _snapshot_key(self) -> tuple:
+        st = self.corpus_path.stat()
+        # Pickled chunks are only valid for the RegulatoryChunk layout that
+        # wrote them; a schema change (e.g. a new field) forces a rebuild
+        schema_digest = hashlib.sha256(
+            json.dumps(RegulatoryChunk.model_json_schema(), sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        return (
+            _SNAPSHOT_VERSION,
+            schema_digest,
+            str(self.corpus_path.resolve()),
+            st.st_mtime_ns,
+            st.st_size,
+        )
+
+    def _load_snapshot(self) -> bool:
+        """Restore chunks and keyword index from the snapshot. Returns True on success."""
+        if not _SNAPSHOT.exists():
+            return False
+        try:
+            with open(_SNAPSHOT, "rb") as f:
+                key, chunks, corpus_lower, chunk_starts = pickle.load(f)
+            if key != self._snapshot_key():
+                # Corpus changed – rebuild
+                return False
+        except Exception:
+            return False
+        self.chunks = chunks
+        self._corpus_lower = corpus_lower
+        self._chunk_starts = chunk_starts
+        return True
+
+    def _save_snapshot(self) -> None:
+        try:
+            with open(_SNAPSHOT, "wb") as f:
+                pickle.dump(
+                    (self._snapshot_key(), self.chunks, self._corpus_lower, self._chunk_starts),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+        except Exception as exc:
+            print(f"[retrieval] Could not write corpus snapshot: {exc}")
+
+    def _build_keyword_index(self) -> None:
+        """Join the lower-cased "text + keywords" of every chunk into one string.
+
+        Keyword retrieval scans this once per query word with str.find and maps
+        hit offsets back to chunks, instead of testing every chunk separately.
+        """
+        chunk_lower = [(c.text + " " + " ".join(c.keywords)).lower() for c in self.chunks]
+        self._chunk_starts: list[int] = []
+        offset = 0
+        for text in chunk_lower:
+            self._chunk_starts.append(offset)
+            offset += len(text) + 1
+        # NUL separator: query words never contain it, so no match spans two chunks
+        self._corpus_lower = "\0".join(chunk_lower)
+
+    def _chunks_containing(self, word: str) -> list[int]:
+        """Indices of chunks whose lower-cased text contains *word*."""
+        hits: list[int] = []
+        pos = self._corpus_lower.find(word)
+        while pos != -1:
+            i = bisect.bisect_right(self._chunk_starts, pos) - 1
+            hits.append(i)
+            if i + 1 == len(self._chunk_starts):
+                break
+            # Count each chunk once: resume the search at the next chunk
+            pos = self._corpus_lower.find(word, self._chunk_starts[i + 1])
+        return hits
+
     # ------------------------------------------------------------------
     # Embedding generation & caching
     # ------------------------------------------------------------------
@@ -82,18 +192,17 @@ class SimpleRetriever:
             ids = [c.chunk_id for c in self.chunks]
 
             vectors = []
-            # Batch in groups of 5 to avoid rate limits
-            batch_size = 5
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i : i + batch_size]
-                for text in batch:
-                    resp = self._client.models.embed_content(
-                        model=EMBED_MODEL,
-                        contents=text,
-                    )
-                    vectors.append(resp.embeddings[0].values)
-
-            self._embeddings = np.array(vectors, dtype=np.float32)
+            # One request per batch – the API embeds a list of contents in a single call
+            for i in range(0, len(texts), _EMBED_BATCH_SIZE):
+                batch = texts[i : i + _EMBED_BATCH_SIZE]
+                resp = self._client.models.embed_content(
+                    model=EMBED_MODEL,
+                    contents=batch,
+                )
+                vectors.extend(e.values for e in resp.embeddings)
+
+            # float16 halves disk/RAM; cosine scores drift by well under 1e-3
+            self._embeddings = _l2_normalize(np.array(vectors, dtype=np.float32)).astype(np.float16)
             self._embed_ids = ids
 
             # Cache to disk
@@ -110,7 +219,7 @@ class SimpleRetriever:
         """Load cached embeddings from disk. Returns True on success."""
         if _EMBED_CACHE.exists() and _IDS_CACHE.exists():
             try:
-                self._embeddings = np.load(str(_EMBED_CACHE))
+                self._embeddings = np.load(str(_EMBED_CACHE), mmap_mode="r")
                 with open(_IDS_CACHE, encoding="utf-8") as f:
                     self._embed_ids = json.load(f)
 
@@ -135,6 +244,26 @@ class SimpleRetriever:
             return True
         return self._build_embeddings()
 
+    def embed_query(self, query: str) -> np.ndarray:
+        """Return the normalised embedding of *query*, reusing cached vectors."""
+        with self._query_cache_lock:
+            cached = self._query_cache.get(query)
+            if cached is not None:
+                self._query_cache.move_to_end(query)
+                return cached
+
+        resp = self._client.models.embed_content(
+            model=EMBED_MODEL,
+            contents=query,
+        )
+        q_vec = _l2_normalize(np.array(resp.embeddings[0].values, dtype=np.float32))
+
+        with self._query_cache_lock:
+            self._query_cache[query] = q_vec
+            if len(self._query_cache) > _QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return q_vec
+
     # ------------------------------------------------------------------
     # Retrieval: embedding-based (primary)
     # ------------------------------------------------------------------
@@ -145,16 +274,19 @@ class SimpleRetriever:
             return self.retrieve_keyword(query, top_k)
 
         try:
-            resp = self._client.models.embed_content(
-                model=EMBED_MODEL,
-                contents=query,
-            )
-            q_vec = np.array(resp.embeddings[0].values, dtype=np.float32)
+            q_vec = self.embed_query(query)
         except Exception:
             return self.retrieve_keyword(query, top_k)
 
-        scores = _cosine_similarity(q_vec, self._embeddings)
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        # Rows are unit-length, so the dot product is the cosine similarity.
+        # Upcast in row blocks: the float16 matrix stays the only full copy
+        # and only one block of float32 rows is resident at a time.
+        emb = self._embeddings
+        scores = np.empty(len(emb), dtype=np.float32)
+        for start in range(0, len(emb), _SCORE_BLOCK_ROWS):
+            block = emb[start : start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            np.matmul(block, q_vec, out=scores[start : start + len(block)])
+        top_indices = _top_k_indices(scores, top_k)
 
         results = []
         for idx in top_indices:
@@ -174,21 +306,20 @@ class SimpleRetriever:
 
     def retrieve_keyword(self, query: str, top_k: int = 5) -> list[dict]:
         """Simple keyword scoring – always available, no API needed."""
-        query_words = [w.lower() for w in query.split() if len(w) > 2]
-
-        scored: list[tuple[float, int]] = []
-        for i, chunk in enumerate(self.chunks):
-            text_lower = chunk.text.lower()
-            kw_lower = " ".join(chunk.keywords).lower()
-            combined = text_lower + " " + kw_lower
+        query_words = [w.lower() for w in query.split() if len(w) > 2 and "\0" not in w]
 
-            score = sum(1 for w in query_words if w in combined)
+        scores = [0] * len(self.chunks)
+        for w in set(query_words):
+            # Repeated query words count once per occurrence
+            weight = query_words.count(w)
             # Boost exact field ID matches (e.g. "r0040")
-            score += sum(3 for w in query_words if w.startswith("r0") and w in combined)
-            scored.append((score, i))
+            if w.startswith("r0"):
+                weight *= 4
+            for i in self._chunks_containing(w):
+                scores[i] += weight
+        scored = [(score, i) for i, score in enumerate(scores)]
 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = scored[:top_k]
+        top = heapq.nlargest(top_k, scored, key=lambda x: x[0])
 
         results = []
         for score, idx in top: